@@ -16,23 +16,45 @@ Referências públicas:
 - Página de guild segue '?subtopic=guilds&page=view&GuildName=<nome>' e lista membros com links.
 """
 
+import asyncio
+import atexit
+import codecs
 import os
 import re
-import csv
 import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html import unescape
 from datetime import datetime
 from urllib.parse import urlparse, urljoin, quote_plus
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from dateutil import parser as dtparser  # python-dateutil
 
-# Diretórios
-BASE_DIR = os.path.dirname(os.path.dirname(__file__))   # raiz do projeto
-DATA_DIR = os.path.join(BASE_DIR, "data")
-SNAP_DIR = os.path.join(DATA_DIR, "snapshots")
-HISTORY_FILE = os.path.join(DATA_DIR, "history.csv")
-PLAYERS_FILE = os.path.join(DATA_DIR, "players.json")
+# Cliente async HTTP/2 quando disponível; sem ele, o coletor cai para o
+# caminho síncrono com ThreadPoolExecutor sobre a SESSION requests.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# Parser C (libxml2) quando disponível; html.parser puro-Python como fallback.
+try:
+    import lxml  # noqa: F401
+    BS_PARSER = "lxml"
+except ImportError:
+    BS_PARSER = "html.parser"
+
+# Helpers de persistência (diretórios, players.json, histórico, snapshots)
+try:
+    from .io_utils import DATA_DIR, ensure_dirs, load_target_players, append_history, save_snapshot
+except ImportError:  # executado como script (python src/collector.py)
+    from io_utils import DATA_DIR, ensure_dirs, load_target_players, append_history, save_snapshot
+
+GUILD_CACHE_FILE = os.path.join(DATA_DIR, ".guild_cache.json")
+PROFILE_CACHE_FILE = os.path.join(DATA_DIR, ".profile_cache.json")
 
 # URL fixa da guild True Knife (pode ser sobrescrita por variável de ambiente GUILD_URL, se quiser)
 GUILD_URL = os.environ.get(
@@ -47,27 +69,97 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml"
 }
 
-# -------- utilidades --------
-
-def ensure_dirs():
-    os.makedirs(DATA_DIR, exist_ok=True)
-    os.makedirs(SNAP_DIR, exist_ok=True)
+# Sessão HTTP compartilhada: keep-alive reaproveita a mesma conexão TCP+TLS
+# com rubinot.com.br em todas as requisições (guild + N perfis), em vez de
+# pagar um handshake novo por chamada.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=0)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
+atexit.register(SESSION.close)
+
+# Caminho rápido para o perfil: extrai o valor de 'Last login' direto do HTML
+# bruto, sem montar DOM. O primeiro regex localiza o rótulo; o segundo captura
+# o primeiro trecho de texto após ele, pulando tags e &nbsp; intermediários —
+# cobre tanto <td>Last login:</td><td>valor</td> quanto rótulo e valor no
+# mesmo nó de texto.
+LAST_LOGIN_LABEL_RE = re.compile(r"Last\s*login\s*:?", re.IGNORECASE)
+LAST_LOGIN_VALUE_RE = re.compile(r"(?:\s|&nbsp;|<[^>]*>)*([^<>&\s][^<]*?)\s*(?=<|$)")
+
+# Regexes do fallback DOM, compilados uma única vez. Atenção: as versões
+# antigas usavam '\\s' em raw string (barra literal + 's'), o que nunca casava
+# com 'Last login' e empurrava toda chamada para a busca lenta de vizinhança.
+LAST_LOGIN_TEXT_RE = re.compile(r"last\s*login", re.IGNORECASE)
+SPLIT_COLON_RE = re.compile(r":\s*")
+DATE_DM_RE = re.compile(r"\d{1,2}/\d{1,2}/\d{2,4}")
+DATE_ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Formatos fixos que o RubinOT usa; strptime é uma ordem de grandeza mais
+# barato que o parser genérico do dateutil, que fica só como último recurso.
+LAST_LOGIN_FORMATS = (
+    "%d/%m/%Y, %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+)
+
+# Da página da guild só interessam as âncoras de perfil. O regex extrai
+# (href, nome) direto do HTML bruto sem alocar uma árvore de Tags; o strainer
+# fica para o fallback DOM caso o template mude e o regex não case nada.
+GUILD_ANCHOR_RE = re.compile(
+    r'<a[^>]+href="([^"]*subtopic=characters[^"]*)"[^>]*>([^<]+)</a>',
+    re.IGNORECASE,
+)
+GUILD_ANCHOR_STRAINER = SoupStrainer("a", href=re.compile(r"subtopic=characters"))
+
+# Limite de requisições simultâneas aos perfis: suficiente para sobrepor a
+# latência de N perfis sem inundar o servidor.
+FETCH_CONCURRENCY = 16
+
+# Tentativas por perfil quando o servidor sinaliza sobrecarga (429/503).
+MAX_FETCH_ATTEMPTS = 5
+
+# Corpo máximo aceito para uma página de perfil; acima disso é anomalia
+# (página de manutenção, dump de erro) e não vale o parse.
+MAX_HTML_BYTES = 512_000
+
+# Pool de processos para o parse DOM de fallback: criado sob demanda (só
+# quando algum perfil escapa do caminho rápido por regex), para que os parses
+# rodem fora do GIL sem bloquear o event loop.
+_PARSE_POOL = None
+
+def _get_parse_pool():
+    global _PARSE_POOL
+    if _PARSE_POOL is None:
+        _PARSE_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+        atexit.register(_PARSE_POOL.shutdown)
+    return _PARSE_POOL
 
-def load_target_players():
-    """
-    Lê 'data/players.json' e retorna set de nomes (normalizados com strip).
-    Levanta erro se o arquivo não existir.
-    """
-    path = PLAYERS_FILE
-    if not os.path.isfile(path):
-        raise FileNotFoundError(
-            f"Não encontrei {path}. Crie a pasta 'data/' e o arquivo 'players.json' com os nomes."
-        )
-    with open(path, "r", encoding="utf-8") as f:
-        players = json.load(f)
+# -------- utilidades --------
 
-    players = [p.strip() for p in players if isinstance(p, str) and p.strip()]
-    return set(players)
+def _load_guild_cache():
+    """Lê o cache de validadores/membros da página da guild ({} se não houver)."""
+    try:
+        with open(GUILD_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_guild_cache(cache):
+    with open(GUILD_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+def _load_profile_cache():
+    """Lê o cache por perfil ({url -> validadores + valores parseados})."""
+    try:
+        with open(PROFILE_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_profile_cache(cache):
+    with open(PROFILE_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
 
 def get_guild_member_links(guild_url: str):
     """
@@ -75,105 +167,345 @@ def get_guild_member_links(guild_url: str):
       - member_links: dict {nome -> URL absoluta do perfil}
       - profile_base: base para montar perfil quando não houver link (fallback)
     Critério: anchors <a> cujo href contenha 'subtopic=characters'.
+
+    Usa GET condicional: envia os validadores ETag/Last-Modified da última
+    coleta e, em 304, reaproveita os member_links cacheados sem baixar nem
+    reparsear o HTML.
     """
-    resp = requests.get(guild_url, headers=HEADERS, timeout=30)
+    cache = _load_guild_cache()
+    cond_headers = {}
+    if cache.get("url") == guild_url and cache.get("member_links"):
+        if cache.get("etag"):
+            cond_headers["If-None-Match"] = cache["etag"]
+        if cache.get("last_modified"):
+            cond_headers["If-Modified-Since"] = cache["last_modified"]
+
+    resp = SESSION.get(guild_url, headers=cond_headers, timeout=30)
+    if resp.status_code == 304:
+        return dict(cache["member_links"]), None
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+    # Extração direta por regex: só as âncoras de perfil interessam, e o
+    # findall dispensa a construção de qualquer árvore. Entidades HTML
+    # (&amp; no href, acentos no nome) são desfeitas com unescape.
+    anchors = GUILD_ANCHOR_RE.findall(resp.text)
+    if not anchors:
+        # Template mudou? Fallback: parse DOM filtrado pelo strainer.
+        soup = BeautifulSoup(resp.text, BS_PARSER, parse_only=GUILD_ANCHOR_STRAINER)
+        anchors = [(a.get("href", ""), a.get_text(strip=True)) for a in soup.find_all("a")]
 
     member_links = {}
 
-    # Anchors que levam ao perfil do personagem
-    for a in soup.select("a[href*='subtopic=characters']"):
-        name = a.get_text(strip=True)
-        href = a.get("href", "")
+    # Base calculada uma única vez: urljoin reparsearia guild_url por âncora.
+    parsed = urlparse(guild_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+
+    for href, name in anchors:
+        name = unescape(name).strip()
+        href = unescape(href)
         if not name or not href:
             continue
-        abs_url = urljoin(guild_url, href)
+        # A página costuma repetir o mesmo membro em mais de uma coluna.
+        if name in member_links:
+            continue
+        if href.startswith("http"):
+            abs_url = href
+        elif href.startswith("/"):
+            abs_url = origin + href
+        elif href.startswith("?"):
+            abs_url = origin + "/" + href
+        else:
+            abs_url = urljoin(guild_url, href)
         member_links[name] = abs_url
 
     # Se não achou links, retorna uma base para tentar montar URL de perfil
     if not member_links:
-        parsed = urlparse(guild_url)
-        profile_base = f"{parsed.scheme}://{parsed.netloc}/?subtopic=characters&name="
+        profile_base = f"{origin}/?subtopic=characters&name="
         return {}, profile_base
 
+    # Guarda validadores + resultado para o GET condicional da próxima coleta.
+    _save_guild_cache({
+        "url": guild_url,
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "member_links": member_links,
+    })
+
     return member_links, None
 
-def fetch_last_login(profile_url: str):
+async def _get_html_with_backoff(client: "httpx.AsyncClient", url: str,
+                                 stop_re: "re.Pattern | None" = None,
+                                 headers: "dict | None" = None):
     """
-    Acessa a página de perfil do personagem e retorna:
-      - last_login_raw: string exatamente como aparece na página
-      - last_login_iso: ISO 8601, se conseguir parsear
-    Busca por 'Last login' (case-insensitive) no HTML.
+    GET com consciência de rate limiting: em 429/503 honra o header
+    'Retry-After' quando presente e, na falta dele, aplica backoff exponencial
+    com jitter. Desiste (raise_for_status) após MAX_FETCH_ATTEMPTS tentativas.
+
+    Retorna (html, etag, last_modified, not_modified). `not_modified` é True
+    só quando o servidor respondeu 304 aos validadores enviados em `headers`;
+    html None com not_modified False significa resposta barrada pelas guardas
+    (não-HTML ou corpo anormalmente grande).
+
+    Se stop_re for passado, o corpo é decodificado incrementalmente e o
+    download para assim que o padrão aparece (com margem para o valor que o
+    segue), evitando baixar o resto da página.
     """
-    resp = requests.get(profile_url, headers=HEADERS, timeout=30)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+    for attempt in range(MAX_FETCH_ATTEMPTS):
+        async with client.stream("GET", url, headers=headers) as resp:
+            if resp.status_code in (429, 503) and attempt < MAX_FETCH_ATTEMPTS - 1:
+                try:
+                    delay = float(resp.headers.get("Retry-After", ""))
+                except ValueError:
+                    delay = float(2 ** attempt)
+                await asyncio.sleep(delay + random.random())
+                continue
+            if resp.status_code == 304:
+                return None, None, None, True
+            resp.raise_for_status()
+            # Guarda barata: resposta não-HTML ou anormalmente grande não é
+            # uma página de perfil — devolve "sem corpo" antes de baixar/parsear.
+            content_type = resp.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type.lower():
+                return None, None, None, False
+            try:
+                content_length = int(resp.headers.get("Content-Length", "0"))
+            except ValueError:
+                content_length = 0
+            if content_length > MAX_HTML_BYTES:
+                return None, None, None, False
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+            if stop_re is None:
+                await resp.aread()
+                return resp.text, etag, last_modified, False
+
+            decoder = codecs.getincrementaldecoder(resp.charset_encoding or "utf-8")("replace")
+            html = ""
+            async for chunk in resp.aiter_bytes(8192):
+                html += decoder.decode(chunk)
+                m = stop_re.search(html)
+                # Margem de 512 chars garante que o valor logo após o rótulo
+                # já esteja no buffer antes de abandonar o resto do corpo.
+                if m and len(html) - m.end() >= 512:
+                    break
+            html += decoder.decode(b"", final=True)
+            return html, etag, last_modified, False
+
+def _parse_profile_html(html: str):
+    """
+    Fallback DOM: extrai a string de 'Last login' do HTML completo do perfil.
+    Função pura (picklável) para poder rodar em processo do pool.
+    """
+    soup = BeautifulSoup(html, BS_PARSER)
 
     # 1) Procura nó de texto com 'Last login'
-    candidate = soup.find(string=re.compile(r"last\\s*login", re.IGNORECASE))
-    last_str = None
+    candidate = soup.find(string=LAST_LOGIN_TEXT_RE)
     if candidate:
         text = candidate.strip()
         # Ex.: "Last login: 24/04/2024, 15:28:07"
-        parts = re.split(r":\\s*", text, maxsplit=1)
+        parts = SPLIT_COLON_RE.split(text, maxsplit=1)
         if len(parts) == 2 and parts[1].strip():
-            last_str = parts[1].strip()
+            return parts[1].strip()
 
-    # 2) Se não achou diretamente, tenta vizinhança/irmãos próximos
+    # 2) Se não achou diretamente, pega a célula vizinha na mesma linha:
+    # o layout do RubinOT é <tr><td>Last login:</td><td>valor</td></tr>.
+    for el in soup.find_all(string=LAST_LOGIN_TEXT_RE):
+        row = el.find_parent("tr")
+        if not row:
+            continue
+        tds = row.find_all("td", limit=2)
+        if len(tds) == 2:
+            t = tds[1].get_text(strip=True)
+            if DATE_DM_RE.search(t) or DATE_ISO_RE.search(t):
+                return t
+
+    return None
+
+def _fast_last_login(html: str):
+    """Caminho rápido: regex sobre o HTML bruto, sem construir árvore."""
+    m = LAST_LOGIN_LABEL_RE.search(html)
+    if m:
+        v = LAST_LOGIN_VALUE_RE.match(html, m.end())
+        if v:
+            return v.group(1).strip()
+    return None
+
+def _last_login_to_iso(last_str):
+    """Converte para ISO 8601 (RubinOT costuma usar dd/mm/yyyy HH:MM:SS)."""
     if not last_str:
-        for el in soup.find_all(text=re.compile(r"last\\s*login", re.IGNORECASE)):
-            parent = el.parent
-            if parent:
-                # procura textos próximos que pareçam data
-                for sib in parent.find_all_next(string=True, limit=4):
-                    t = (sib or "").strip()
-                    if not t or t == el.strip():
-                        continue
-                    if re.search(r"\\d{1,2}/\\d{1,2}/\\d{2,4}", t) or re.search(r"\\d{4}-\\d{2}-\\d{2}", t):
-                        last_str = t
-                        break
-            if last_str:
-                break
-
-    # 3) Tenta converter para ISO (RubinOT costuma usar dd/mm/yyyy HH:MM:SS)
-    last_iso = None
-    if last_str:
+        return None
+    for fmt in LAST_LOGIN_FORMATS:
         try:
-            dt = dtparser.parse(last_str, dayfirst=True)
-            last_iso = dt.isoformat()
-        except Exception:
-            pass
+            return datetime.strptime(last_str, fmt).isoformat()
+        except ValueError:
+            continue
+    # Formato inesperado: deixa o dateutil tentar adivinhar.
+    try:
+        return dtparser.parse(last_str, dayfirst=True).isoformat()
+    except Exception:
+        return None
+
+def _cond_headers(cache_entry):
+    """Headers If-None-Match/If-Modified-Since a partir do cache (ou None)."""
+    cond = {}
+    if cache_entry:
+        if cache_entry.get("etag"):
+            cond["If-None-Match"] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            cond["If-Modified-Since"] = cache_entry["last_modified"]
+    return cond or None
+
+def _make_cache_entry(etag, last_modified, last_str, last_iso):
+    if not (etag or last_modified):
+        return None
+    return {
+        "etag": etag,
+        "last_modified": last_modified,
+        "last_login_raw": last_str,
+        "last_login_iso": last_iso,
+    }
+
+async def fetch_last_login(client: "httpx.AsyncClient", profile_url: str,
+                           cache_entry: "dict | None" = None):
+    """
+    Acessa a página de perfil do personagem e retorna:
+      - last_login_raw: string exatamente como aparece na página
+      - last_login_iso: ISO 8601, se conseguir parsear
+      - cache_entry: validadores + valores para o GET condicional da próxima
+        coleta (None se o servidor não mandou ETag/Last-Modified)
+    Busca por 'Last login' (case-insensitive) no HTML. Quando `cache_entry`
+    da coleta anterior é fornecido, envia os validadores e, em 304, devolve
+    os valores cacheados sem baixar nem parsear a página.
+    """
+    html, etag, last_modified, not_modified = await _get_html_with_backoff(
+        client, profile_url, stop_re=LAST_LOGIN_LABEL_RE,
+        headers=_cond_headers(cache_entry))
+    if not_modified and cache_entry:
+        # 304: o perfil não mudou desde a última coleta.
+        return cache_entry["last_login_raw"], cache_entry["last_login_iso"], cache_entry
+    if html is None:
+        # Resposta não-HTML/anômala barrada pela guarda: sem dado nesta coleta.
+        return None, None, None
+
+    last_str = _fast_last_login(html)
+
+    # Só paga o parse completo se o regex não encontrou (mudança de template
+    # etc.), e o faz num processo do pool para não segurar o GIL do loop.
+    if not last_str:
+        loop = asyncio.get_running_loop()
+        last_str = await loop.run_in_executor(_get_parse_pool(), _parse_profile_html, html)
 
-    return last_str, last_iso
+    last_iso = _last_login_to_iso(last_str)
+    return last_str, last_iso, _make_cache_entry(etag, last_modified, last_str, last_iso)
 
-def append_history(collection_ts_iso: str, rows):
+def fetch_last_login_sync(profile_url: str, cache_entry: "dict | None" = None):
     """
-    rows: lista de dicts com {'player','profile_url','last_login_raw','last_login_iso'}
+    Variante síncrona de fetch_last_login sobre a SESSION requests, com o
+    mesmo backoff, guardas e contrato de retorno. Usada pelo caminho com
+    ThreadPoolExecutor quando httpx não está instalado.
     """
-    file_exists = os.path.isfile(HISTORY_FILE)
-    with open(HISTORY_FILE, "a", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        if not file_exists:
-            w.writerow(["collected_at", "player", "profile_url", "last_login_raw", "last_login_iso"])
-        for r in rows:
-            w.writerow([
-                collection_ts_iso,
-                r.get("player"),
-                r.get("profile_url"),
-                r.get("last_login_raw"),
-                r.get("last_login_iso"),
-            ])
-
-def save_snapshot(collection_ts_iso: str, rows):
-    """Salva snapshot JSON com os dados coletados."""
-    fname = os.path.join(SNAP_DIR, f"snapshot_{collection_ts_iso.replace(':','-')}.json")
-    with open(fname, "w", encoding="utf-8") as f:
-        json.dump({
-            "timestamp": collection_ts_iso,
-            "guild_url": GUILD_URL,
-            "players": rows
-        }, f, ensure_ascii=False, indent=2)
+    for attempt in range(MAX_FETCH_ATTEMPTS):
+        resp = SESSION.get(profile_url, headers=_cond_headers(cache_entry), timeout=30)
+        if resp.status_code in (429, 503) and attempt < MAX_FETCH_ATTEMPTS - 1:
+            try:
+                delay = float(resp.headers.get("Retry-After", ""))
+            except ValueError:
+                delay = float(2 ** attempt)
+            time.sleep(delay + random.random())
+            continue
+        break
+
+    if resp.status_code == 304 and cache_entry:
+        return cache_entry["last_login_raw"], cache_entry["last_login_iso"], cache_entry
+    resp.raise_for_status()
+
+    content_type = resp.headers.get("Content-Type", "")
+    if content_type and "html" not in content_type.lower():
+        return None, None, None
+    try:
+        content_length = int(resp.headers.get("Content-Length", "0"))
+    except ValueError:
+        content_length = 0
+    if content_length > MAX_HTML_BYTES:
+        return None, None, None
+
+    html = resp.text
+    last_str = _fast_last_login(html) or _parse_profile_html(html)
+    last_iso = _last_login_to_iso(last_str)
+    return last_str, last_iso, _make_cache_entry(
+        resp.headers.get("ETag"), resp.headers.get("Last-Modified"), last_str, last_iso)
+
+async def _bounded_fetch(sem: asyncio.Semaphore, client: "httpx.AsyncClient",
+                         profile_url: str, cache_entry=None):
+    async with sem:
+        return await fetch_last_login(client, profile_url, cache_entry)
+
+async def collect_last_logins(targets):
+    """
+    targets: lista de tuplas (player, profile_url).
+    Dispara todas as buscas de perfil em paralelo (limitadas por semáforo)
+    e retorna as rows na mesma ordem. Falhas individuais viram WARN, como
+    na versão serial. Perfis inalterados desde a última coleta respondem 304
+    graças ao cache de validadores em data/.profile_cache.json.
+    """
+    cache = _load_profile_cache()
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    # HTTP/2 multiplexa os N GETs em poucas conexões TLS; se o servidor só
+    # falar HTTP/1.1, o httpx cai para h1 com keep-alive automaticamente.
+    limits = httpx.Limits(max_connections=4, max_keepalive_connections=4)
+    async with httpx.AsyncClient(http2=True, headers=HEADERS, timeout=30,
+                                 limits=limits, follow_redirects=True) as client:
+        results = await asyncio.gather(
+            *[_bounded_fetch(sem, client, url, cache.get(url)) for _, url in targets],
+            return_exceptions=True,
+        )
+
+    return _rows_from_results(targets, results)
+
+def collect_last_logins_threaded(targets):
+    """
+    Alternativa sem httpx: paraleliza fetch_last_login_sync num
+    ThreadPoolExecutor. As threads soltam o GIL durante o I/O de socket/TLS,
+    então as N buscas se sobrepõem quase como no caminho async, reaproveitando
+    a SESSION (thread-safe para GET) e o mesmo cache de perfis.
+    """
+    cache = _load_profile_cache()
+
+    def job(item):
+        _, profile_url = item
+        try:
+            return fetch_last_login_sync(profile_url, cache.get(profile_url))
+        except Exception as e:
+            # Mesmo contrato do gather(return_exceptions=True).
+            return e
+
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as ex:
+        results = list(ex.map(job, targets))
+
+    return _rows_from_results(targets, results)
+
+def _rows_from_results(targets, results):
+    """Monta as rows na ordem de targets e regrava o cache de perfis."""
+    rows = []
+    new_cache = {}
+    for (player, profile_url), result in zip(targets, results):
+        last_raw, last_iso = None, None
+        if isinstance(result, BaseException):
+            print(f"[WARN] Falha ao ler perfil de '{player}': {result}")
+        else:
+            last_raw, last_iso, cache_entry = result
+            if cache_entry:
+                new_cache[profile_url] = cache_entry
+        rows.append({
+            "player": player,
+            "profile_url": profile_url,
+            "last_login_raw": last_raw,
+            "last_login_iso": last_iso,
+        })
+
+    # Reescreve o cache só com os perfis desta coleta (poda quem saiu da guild).
+    _save_profile_cache(new_cache)
+    return rows
 
 # -------- execução --------
 
@@ -209,31 +541,25 @@ def main():
         print("[INFO] Nenhum dos jogadores em data/players.json está atualmente listado como membro da guild True Knife.")
         return
 
-    # 4) Para cada jogador focado, acessar o perfil via link da própria página da guild
-    rows = []
-    for player in focus:
-        profile_url = member_links.get(player)
-        if not profile_url:
-            # Em teoria não deve acontecer se member_links veio; se acontecer, pula.
-            print(f"[WARN] Perfil não encontrado via link para '{player}'. Pulando.")
-            continue
-
-        last_raw, last_iso = None, None
-        try:
-            last_raw, last_iso = fetch_last_login(profile_url)
-        except Exception as e:
-            print(f"[WARN] Falha ao ler perfil de '{player}': {e}")
-
-        rows.append({
-            "player": player,
-            "profile_url": profile_url,
-            "last_login_raw": last_raw,
-            "last_login_iso": last_iso,
-        })
+    # 4) Para cada jogador focado, acessar o perfil via link da própria página da guild.
+    # As buscas são independentes e limitadas por latência, então rodam em paralelo.
+    # Base de fallback montada uma única vez fora do loop; cada jogador vira
+    # um lookup no dict ou uma concatenação.
+    parsed = urlparse(GUILD_URL)
+    fallback_base = profile_base or f"{parsed.scheme}://{parsed.netloc}/?subtopic=characters&name="
+    targets = [
+        (player, member_links.get(player) or (fallback_base + quote_plus(player)))
+        for player in focus
+    ]
+
+    if httpx is not None:
+        rows = asyncio.run(collect_last_logins(targets))
+    else:
+        rows = collect_last_logins_threaded(targets)
 
     # 5) Persistência
     ts = datetime.utcnow().isoformat(timespec="seconds") + "Z"
-    save_snapshot(ts, rows)
+    save_snapshot(ts, rows, GUILD_URL)
     append_history(ts, rows)
 
     ok = sum(1 for r in rows if r["last_login_raw"])
@@ -0,0 +1,88 @@
+
+# src/io_utils.py
+# -*- coding: utf-8 -*-
+"""
+Helpers de entrada/saída do coletor: diretórios, lista nominal de jogadores,
+histórico CSV e snapshots JSON. Mantidos fora de collector.py para deixar lá
+apenas a lógica de scraping/HTTP.
+"""
+
+import os
+import csv
+import json
+
+# Serializador nativo (Rust) para os snapshots; json da stdlib como fallback.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Diretórios
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))   # raiz do projeto
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SNAP_DIR = os.path.join(DATA_DIR, "snapshots")
+HISTORY_FILE = os.path.join(DATA_DIR, "history.csv")
+PLAYERS_FILE = os.path.join(DATA_DIR, "players.json")
+
+
+def ensure_dirs():
+    os.makedirs(DATA_DIR, exist_ok=True)
+    os.makedirs(SNAP_DIR, exist_ok=True)
+
+def load_target_players():
+    """
+    Lê 'data/players.json' e retorna set de nomes (normalizados com strip).
+    Levanta erro se o arquivo não existir.
+    """
+    path = PLAYERS_FILE
+    if not os.path.isfile(path):
+        raise FileNotFoundError(
+            f"Não encontrei {path}. Crie a pasta 'data/' e o arquivo 'players.json' com os nomes."
+        )
+    with open(path, "r", encoding="utf-8") as f:
+        players = json.load(f)
+
+    players = [p.strip() for p in players if isinstance(p, str) and p.strip()]
+    return set(players)
+
+def append_history(collection_ts_iso: str, rows):
+    """
+    rows: lista de dicts com {'player','profile_url','last_login_raw','last_login_iso'}
+    """
+    file_exists = os.path.isfile(HISTORY_FILE)
+    # Buffer largo + writerows: o loop roda em C dentro do csv e o conteúdo
+    # desce para o SO em poucas escritas, não uma por linha.
+    with open(HISTORY_FILE, "a", newline="", encoding="utf-8", buffering=1 << 16) as f:
+        w = csv.writer(f)
+        if not file_exists:
+            w.writerow(["collected_at", "player", "profile_url", "last_login_raw", "last_login_iso"])
+        w.writerows(
+            (
+                collection_ts_iso,
+                r.get("player"),
+                r.get("profile_url"),
+                r.get("last_login_raw"),
+                r.get("last_login_iso"),
+            )
+            for r in rows
+        )
+
+def save_snapshot(collection_ts_iso: str, rows, guild_url: str):
+    """
+    Anexa o snapshot da coleta como uma linha no JSONL diário
+    (data/snapshots/AAAA-MM-DD.jsonl). Um arquivo por dia em vez de um por
+    execução: menos inodes/syscalls e consumo por streaming
+    (for line in f: json.loads(line)).
+    """
+    fname = os.path.join(SNAP_DIR, f"{collection_ts_iso[:10]}.jsonl")
+    payload = {
+        "timestamp": collection_ts_iso,
+        "guild_url": guild_url,
+        "players": rows
+    }
+    if orjson is not None:
+        line = orjson.dumps(payload).decode()
+    else:
+        line = json.dumps(payload, ensure_ascii=False)
+    with open(fname, "a", encoding="utf-8") as f:
+        f.write(line + "\n")